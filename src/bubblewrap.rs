@@ -1,14 +1,16 @@
 use std::collections::BTreeSet;
-use std::io::{self, Write};
+use std::fs::File;
+use std::io::{self, IsTerminal, Write};
+use std::os::fd::OwnedFd;
 use std::os::unix::fs::PermissionsExt;
 use std::path::Path;
-use std::process::{ChildStdout, Stdio};
+use std::process::Stdio;
 use std::rc::Rc;
 use tempfile::NamedTempFile;
 
 use super::apt;
 use super::command_ext::Command;
-use super::fs_util::{rmtree, summarize_dir, try_exists, try_iterdir_dirs, DirSummary};
+use super::fs_util::{rmtree, summarize_dirs, try_exists, try_iterdir_dirs};
 use super::paths::EnvPath;
 use super::runner::{
     EnvFilesSummary, EnvironmentExists, Init, Runner, RunnerCommand, Target,
@@ -31,7 +33,9 @@ struct Dirs {
 struct BwrapArgs<'a> {
     bind: &'a [(&'a HostPath, &'a EnvPath)],
     run: &'a RunnerCommand<'a>,
-    stdin: Option<ChildStdout>,
+    /// Copied to the command's stdin one after another. If empty, the
+    /// command inherits stdin instead.
+    stdin: Vec<File>,
 }
 
 impl Bubblewrap {
@@ -89,11 +93,26 @@ impl Bubblewrap {
 
         if !seeds.is_empty() {
             println!("Copying/extracting seed tarball");
-            let mut child = Command::new("pv")
-                .args(["--interval", "0.1"])
-                .args(seeds.iter().map(|s| s.as_host_raw()))
-                .stdout(Stdio::piped())
-                .scoped_spawn()?;
+            // `pv` only shows progress on a terminal. Otherwise, copy the
+            // seeds here rather than spawning another process.
+            let (_pv, stdin) = if io::stderr().is_terminal() {
+                let mut child = Command::new("pv")
+                    .args(["--interval", "0.1"])
+                    .args(seeds.iter().map(|s| s.as_host_raw()))
+                    .stdout(Stdio::piped())
+                    .scoped_spawn()?;
+                let stdout = child.stdout().take().unwrap();
+                (Some(child), vec![File::from(OwnedFd::from(stdout))])
+            } else {
+                let files = seeds
+                    .iter()
+                    .map(|seed| {
+                        File::open(seed.as_host_raw())
+                            .with_context(|| format!("failed to open seed tarball {seed}"))
+                    })
+                    .collect::<Result<Vec<_>>>()?;
+                (None, files)
+            };
             self.bwrap(
                 name,
                 BwrapArgs {
@@ -103,7 +122,7 @@ impl Bubblewrap {
                             .map(|s| s.to_owned()),
                         env_vars: &[],
                     },
-                    stdin: child.stdout().take(),
+                    stdin,
                 },
             )?;
         };
@@ -141,7 +160,7 @@ impl Bubblewrap {
                     command: &[init_script_str.to_owned()],
                     env_vars,
                 },
-                stdin: None,
+                stdin: Vec::new(),
             },
         )
     }
@@ -253,18 +272,21 @@ impl Bubblewrap {
             }
         }
 
-        let status = match stdin {
-            None => command.status(),
-            Some(mut reader) => {
-                command.stdin(Stdio::piped());
-                let mut child = command.scoped_spawn()?;
-                {
-                    let mut writer = child.stdin().take().unwrap();
+        let status = if stdin.is_empty() {
+            command.status()
+        } else {
+            command.stdin(Stdio::piped());
+            let mut child = command.scoped_spawn()?;
+            {
+                let mut writer = child.stdin().take().unwrap();
+                // Copying from each `File` directly lets `io::copy` use
+                // `copy_file_range`/`splice` on Linux.
+                for mut reader in stdin {
                     io::copy(&mut reader, &mut writer).todo_context()?;
-                    // drop writer to close stdin
                 }
-                child.wait()
+                // drop writer to close stdin
             }
+            child.wait()
         }?;
 
         if status.success() {
@@ -391,18 +413,11 @@ impl Runner for Bubblewrap {
         } = self.dirs(name);
 
         let home_dir_exists = try_exists(&home_dir).todo_context()?;
-        let home_dir_summary = if home_dir_exists {
-            summarize_dir(&home_dir)?
-        } else {
-            DirSummary::new_with_errors()
-        };
-
         let work_dir_exists = try_exists(&work_dir).todo_context()?;
-        let work_dir_summary = if work_dir_exists {
-            summarize_dir(&work_dir)?
-        } else {
-            DirSummary::new_with_errors()
-        };
+        // Missing directories are summarized with the `errors` flag set.
+        let mut summaries = summarize_dirs(&[&home_dir, &work_dir]).into_iter();
+        let home_dir_summary = summaries.next().unwrap();
+        let work_dir_summary = summaries.next().unwrap();
 
         Ok(EnvFilesSummary {
             home_dir_path: home_dir_exists.then_some(home_dir),
@@ -438,7 +453,7 @@ impl Runner for Bubblewrap {
             BwrapArgs {
                 bind: &[],
                 run,
-                stdin: None,
+                stdin: Vec::new(),
             },
         )
     }
@@ -12,33 +12,36 @@ use std::fmt;
 /// A count of bytes. This type is useful for its [`fmt::Display`] impl.
 pub struct Bytes(pub u64);
 
+/// The smallest count displayed with each unit in [`UNITS`] after `"B"`.
+///
+/// Except for `"kB"`, these are slightly below a power of 1000 so that values
+/// which would round up to `1000.0` of one unit display as `1.0` of the next.
+const LIMITS: [u64; 6] = [
+    1_000,
+    999_950,
+    999_950_000,
+    999_950_000_000,
+    999_950_000_000_000,
+    999_950_000_000_000_000,
+];
+
+const UNITS: [&str; 7] = ["B", "kB", "MB", "GB", "TB", "PB", "EB"];
+
 impl fmt::Display for Bytes {
     fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
-        if self.0 < 1_000 {
-            write!(f, "{} B", self.0)
-        } else if self.0 < 999_950 {
-            write!(f, "{:.1} kB", (self.0 as f64) / 1e3)
-        } else if self.0 < 999_950_000 {
-            write!(f, "{:.1} MB", (self.0 as f64) / 1e6)
-        } else if self.0 < 999_950_000_000 {
-            write!(f, "{:.1} GB", (self.0 as f64) / 1e9)
-        } else if self.0 < 999_950_000_000_000 {
-            write!(f, "{:.1} TB", (self.0 as f64) / 1e12)
-        } else if self.0 < 999_950_000_000_000_000 {
-            write!(
-                f,
-                "{:.1} PB",
-                if self.0 <= 9_007_199_254_740_992 {
-                    (self.0 as f64) / 1e15
-                } else {
-                    // Larger integers can't be represented exactly in an f64.
-                    // It's probably best to divide some first.
-                    (self.0 / 1_000_000_000_000) as f64 / 1e3
-                }
-            )
-        } else {
-            write!(f, "{:.1} EB", (self.0 / 1_000_000_000_000_000) as f64 / 1e3)
+        let i = LIMITS.partition_point(|&limit| self.0 >= limit);
+        if i == 0 {
+            return write!(f, "{} B", self.0);
         }
+        let divisor = 1_000_u64.pow(i as u32);
+        let value = if self.0 <= 9_007_199_254_740_992 {
+            (self.0 as f64) / (divisor as f64)
+        } else {
+            // Larger integers can't be represented exactly in an f64.
+            // It's probably best to divide some first.
+            (self.0 / (divisor / 1_000)) as f64 / 1e3
+        };
+        write!(f, "{value:.1} {}", UNITS[i])
     }
 }
 
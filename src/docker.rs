@@ -1,16 +1,16 @@
-use regex::{Regex, RegexBuilder};
 use std::collections::BTreeSet;
 use std::ffi::{OsStr, OsString};
-use std::io::{self, BufRead, IsTerminal, Write};
+use std::io::{self, IsTerminal, Write};
 use std::path::Path;
 use std::process::Stdio;
 use std::rc::Rc;
 use std::str::FromStr;
-use std::sync::OnceLock;
 use std::time::{Duration, UNIX_EPOCH};
 
 use super::command_ext::Command;
-use super::fs_util::{rmtree, summarize_dir, try_exists, try_iterdir_dirs, DirSummary};
+use super::fs_util::{
+    rmtree, summarize_dirs, try_exists, try_iterdir_dirs, try_summarize_dir, DirSummary,
+};
 use super::os_util::{get_timezone, get_uids, Uids};
 use super::paths::EnvPath;
 use super::runner::{
@@ -193,10 +193,11 @@ impl Docker {
             .into());
         }
 
+        let stdout =
+            String::from_utf8(output.stdout).context("could not read `docker ps` output")?;
         let mut envs = Vec::new();
-        for line in output.stdout.lines() {
-            let line = line.context("could not read `docker ps` output")?;
-            if let Some(container_name) = ContainerName::decode(&line) {
+        for line in stdout.lines() {
+            if let Some(container_name) = ContainerName::decode(line) {
                 if let Some(name) = container_name
                     .decoded()
                     .strip_prefix(&self.program.config.docker.prefix)
@@ -421,16 +422,9 @@ impl Docker {
             .into());
         }
 
-        output
-            .stdout
-            .lines()
-            .filter_map(|line| {
-                line.map(|name| VolumeName::decode(&name))
-                    .context("failed to read `docker volume ls` output")
-                    .map_err(|e| e.into())
-                    .transpose()
-            })
-            .collect()
+        let stdout =
+            String::from_utf8(output.stdout).context("failed to read `docker volume ls` output")?;
+        Ok(stdout.lines().filter_map(VolumeName::decode).collect())
     }
 
     fn volume_exists(&self, name: &VolumeName) -> Result<bool> {
@@ -483,7 +477,15 @@ impl Docker {
         Ok(Some(HostPath::try_from(stdout)?))
     }
 
-    fn volume_du(&self, name: &VolumeName) -> Result<DirSummary> {
+    fn volume_du(&self, name: &VolumeName, mountpoint: Option<&HostPath>) -> Result<DirSummary> {
+        // Walking the volume directly from the host avoids starting a
+        // container just to run `du`. This usually only works with rootless
+        // Docker, since the volumes are otherwise accessible only to root.
+        // Even then, files owned by subuids may be unreadable, so this gives
+        // up at the first error rather than walking the rest of the volume.
+        if let Some(summary) = mountpoint.and_then(try_summarize_dir) {
+            return Ok(summary);
+        }
         self.volume_du_(name)
             .with_context(|| format!("failed to summarize disk usage of Docker volume {name}"))
     }
@@ -498,6 +500,9 @@ impl Docker {
             .arg("--rm")
             .arg("debian:12")
             .arg("du")
+            // Count apparent sizes rather than allocated blocks, like
+            // `summarize_dir` does (though `du` also counts directories).
+            .arg("--apparent-size")
             .arg("--block-size=1")
             .arg("--summarize")
             .arg("--time")
@@ -520,26 +525,12 @@ impl Docker {
         let stdout = String::from_utf8(output.stdout)
             .context("failed to read `docker run ... -- du ...` output")?;
 
-        static RE: OnceLock<Regex> = OnceLock::new();
-        let re = RE.get_or_init(|| {
-            RegexBuilder::new(r#"^(?P<size>[0-9]+)\t(?P<mtime>[0-9]+)\t/v$"#)
-                .build()
-                .unwrap()
-        });
-
-        match re.captures(stdout.trim_end()) {
-            Some(caps) => {
-                let size = caps.name("size").unwrap().as_str();
-                let size = u64::from_str(size).unwrap();
-                let mtime = caps.name("mtime").unwrap().as_str();
-                let mtime = u64::from_str(mtime).unwrap();
-                let mtime = UNIX_EPOCH + Duration::from_secs(mtime);
-                Ok(DirSummary {
-                    errors,
-                    total_size: size,
-                    last_modified: mtime,
-                })
-            }
+        match parse_du_line(stdout.trim_end()) {
+            Some((size, mtime)) => Ok(DirSummary {
+                errors,
+                total_size: size,
+                last_modified: UNIX_EPOCH + Duration::from_secs(mtime),
+            }),
             None => {
                 Err(anyhow!("unexpected output from `docker run ... -- du ...`: {stdout:?}").into())
             }
@@ -915,18 +906,11 @@ impl Runner for Docker {
                 host_work: work_dir,
             } => {
                 let home_dir_exists = try_exists(&home_dir).todo_context()?;
-                let home_dir_summary = if home_dir_exists {
-                    summarize_dir(&home_dir)?
-                } else {
-                    DirSummary::new_with_errors()
-                };
-
                 let work_dir_exists = try_exists(&work_dir).todo_context()?;
-                let work_dir_summary = if work_dir_exists {
-                    summarize_dir(&work_dir)?
-                } else {
-                    DirSummary::new_with_errors()
-                };
+                // Missing directories are summarized with the `errors` flag set.
+                let mut summaries = summarize_dirs(&[&home_dir, &work_dir]).into_iter();
+                let home_dir_summary = summaries.next().unwrap();
+                let work_dir_summary = summaries.next().unwrap();
 
                 Ok(EnvFilesSummary {
                     home_dir_path: home_dir_exists.then_some(home_dir),
@@ -939,12 +923,18 @@ impl Runner for Docker {
             EnvMounts::Volumes {
                 home_volume,
                 work_volume,
-            } => Ok(EnvFilesSummary {
-                home_dir_path: self.volume_mountpoint(&home_volume)?,
-                home_dir: self.volume_du(&home_volume)?,
-                work_dir_path: self.volume_mountpoint(&work_volume)?,
-                work_dir: self.volume_du(&work_volume)?,
-            }),
+            } => {
+                let home_dir_path = self.volume_mountpoint(&home_volume)?;
+                let home_dir = self.volume_du(&home_volume, home_dir_path.as_ref())?;
+                let work_dir_path = self.volume_mountpoint(&work_volume)?;
+                let work_dir = self.volume_du(&work_volume, work_dir_path.as_ref())?;
+                Ok(EnvFilesSummary {
+                    home_dir_path,
+                    home_dir,
+                    work_dir_path,
+                    work_dir,
+                })
+            }
         }
     }
 
@@ -1001,6 +991,23 @@ impl Runner for Docker {
     }
 }
 
+/// Parses the size and modification time out of a line of `du --summarize
+/// --time --time-style=+%s /v` output, like "<size>\t<mtime>\t/v".
+fn parse_du_line(line: &str) -> Option<(u64, u64)> {
+    let mut fields = line.split('\t');
+    match (fields.next(), fields.next(), fields.next(), fields.next()) {
+        (Some(size), Some(mtime), Some("/v"), None) => {
+            let digits = |s: &str| s.bytes().all(|b| b.is_ascii_digit());
+            if digits(size) && digits(mtime) {
+                u64::from_str(size).ok().zip(u64::from_str(mtime).ok())
+            } else {
+                None
+            }
+        }
+        _ => None,
+    }
+}
+
 fn fallback_path(container_home: &EnvPath) -> OsString {
     let home_bin = container_home.join("bin");
     let paths = [
@@ -1207,6 +1214,30 @@ mod tests {
         );
     }
 
+    #[test]
+    fn parse_du_line() {
+        assert_eq!(
+            Some((4096, 1700000000)),
+            super::parse_du_line("4096\t1700000000\t/v")
+        );
+        assert_eq!(
+            Some((u64::MAX, 0)),
+            super::parse_du_line("18446744073709551615\t0\t/v")
+        );
+        assert_eq!(None, super::parse_du_line("4096\t1700000000\t/w"));
+        assert_eq!(None, super::parse_du_line("4096\t1700000000\t/v/x"));
+        assert_eq!(None, super::parse_du_line("4096\t1700000000\t/v\textra"));
+        assert_eq!(None, super::parse_du_line("4096\t1700000000"));
+        assert_eq!(None, super::parse_du_line("4096\t17000x0000\t/v"));
+        assert_eq!(None, super::parse_du_line("+4096\t1700000000\t/v"));
+        assert_eq!(None, super::parse_du_line("\t1700000000\t/v"));
+        // Overflows u64.
+        assert_eq!(
+            None,
+            super::parse_du_line("18446744073709551616\t1700000000\t/v")
+        );
+    }
+
     #[test]
     fn write_dockerfile() {
         let mut buf: Vec<u8> = Vec::new();
@@ -102,7 +102,7 @@ pub fn file_size_cap(metadata: &cap_std::fs::Metadata) -> Option<u64> {
     None
 }
 
-#[derive(Debug)]
+#[derive(Clone, Debug)]
 pub struct DirSummary {
     pub errors: bool,
     pub total_size: u64,
@@ -119,7 +119,23 @@ impl DirSummary {
     }
 }
 
-pub fn summarize_dir(path: &HostPath) -> Result<DirSummary> {
+/// Walks the directory to total up the sizes and find the latest modification
+/// time of its contents.
+///
+/// This does not fail. Any entry that can't be read, including the directory
+/// itself, sets the `errors` flag instead.
+pub fn summarize_dir(path: &HostPath) -> DirSummary {
+    summarize_dir_(path, false)
+}
+
+/// Like [`summarize_dir`] but gives up at the first entry that can't be read,
+/// returning `None`.
+pub fn try_summarize_dir(path: &HostPath) -> Option<DirSummary> {
+    let summary = summarize_dir_(path, true);
+    (!summary.errors).then_some(summary)
+}
+
+fn summarize_dir_(path: &HostPath, stop_on_error: bool) -> DirSummary {
     fn handle_entry(summary: &mut DirSummary, entry: Result<WalkDirEntry>) {
         match entry {
             Ok(WalkDirEntry { entry, .. }) => {
@@ -151,22 +167,80 @@ pub fn summarize_dir(path: &HostPath) -> Result<DirSummary> {
         }
     }
 
+    let walk = match WalkDir::new(path) {
+        Ok(walk) => walk,
+        Err(_) => return DirSummary::new_with_errors(),
+    };
     let mut summary = DirSummary {
         errors: false,
         total_size: 0,
         last_modified: UNIX_EPOCH,
     };
-    for entry in WalkDir::new(path)? {
+    for entry in walk {
         handle_entry(&mut summary, entry);
+        if stop_on_error && summary.errors {
+            break;
+        }
     }
-    Ok(summary)
+    summary
+}
+
+/// Runs [`summarize_dir`] on each of the paths, returning the results in the
+/// same order.
+///
+/// The directory walks are independent and tend to be bound by filesystem
+/// latency, so they're spread across a few threads.
+pub fn summarize_dirs(paths: &[&HostPath]) -> Vec<DirSummary> {
+    const MAX_THREADS: usize = 32;
+    if paths.len() <= 1 {
+        return paths.iter().map(|path| summarize_dir(path)).collect();
+    }
+    let chunk_size = paths.len().div_ceil(MAX_THREADS);
+    std::thread::scope(|scope| {
+        let handles = paths
+            .chunks(chunk_size)
+            .map(|chunk| {
+                scope.spawn(move || {
+                    chunk
+                        .iter()
+                        .map(|path| summarize_dir(path))
+                        .collect::<Vec<_>>()
+                })
+            })
+            .collect::<Vec<_>>();
+        handles
+            .into_iter()
+            .flat_map(|handle| {
+                handle
+                    .join()
+                    .unwrap_or_else(|panic| std::panic::resume_unwind(panic))
+            })
+            .collect()
+    })
 }
 
 pub fn try_iterdir(path: &HostPath) -> Result<Vec<OsString>> {
+    let mut names = try_iterdir_unsorted(path)?;
+    names.sort_unstable();
+    Ok(names)
+}
+
+/// Like [`try_iterdir`] but returns the names in directory order. This is
+/// useful when the caller only searches the names or collects them into a
+/// sorted set anyway.
+pub fn try_iterdir_unsorted(path: &HostPath) -> Result<Vec<OsString>> {
     try_iterdir_with_filter(path, |_| Ok(true))
 }
 
 pub fn try_iterdir_dirs(path: &HostPath) -> Result<Vec<OsString>> {
+    let mut names = try_iterdir_dirs_unsorted(path)?;
+    names.sort_unstable();
+    Ok(names)
+}
+
+/// Like [`try_iterdir_dirs`] but returns the names in directory order. See
+/// [`try_iterdir_unsorted`].
+pub fn try_iterdir_dirs_unsorted(path: &HostPath) -> Result<Vec<OsString>> {
     try_iterdir_with_filter(path, |entry| Ok(entry.file_type()?.is_dir()))
 }
 
@@ -178,7 +252,7 @@ where
     if matches!(&readdir, Err(e) if e.kind() == io::ErrorKind::NotFound) {
         return Ok(Vec::new());
     };
-    let mut names = readdir
+    readdir
         .todo_context()?
         .filter_map(|entry| -> Option<io::Result<OsString>> {
             match entry {
@@ -191,9 +265,7 @@ where
             }
         })
         .collect::<io::Result<Vec<_>>>()
-        .todo_context()?;
-    names.sort_unstable();
-    Ok(names)
+        .todo_context()
 }
 
 pub struct WalkDirCursor {
@@ -363,3 +435,30 @@ pub fn try_exists(path: &HostPath) -> io::Result<bool> {
         Err(error) => Err(error),
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use super::HostPath;
+
+    #[test]
+    fn summarize_dirs_preserves_order() {
+        let tmpdir = tempfile::tempdir().unwrap();
+        let tmpdir_path = HostPath::try_from(tmpdir.path().canonicalize().unwrap()).unwrap();
+        // More directories than threads, so some threads get several.
+        let dirs: Vec<HostPath> = (0..40)
+            .map(|i| {
+                let dir = tmpdir_path.join(format!("dir{i}"));
+                std::fs::create_dir(dir.as_host_raw()).unwrap();
+                std::fs::write(dir.join("file").as_host_raw(), vec![0u8; i]).unwrap();
+                dir
+            })
+            .collect();
+        let paths: Vec<&HostPath> = dirs.iter().collect();
+        let summaries = super::summarize_dirs(&paths);
+        assert_eq!(summaries.len(), dirs.len());
+        for (i, summary) in summaries.iter().enumerate() {
+            assert!(!summary.errors, "errors summarizing {}", dirs[i]);
+            assert_eq!(summary.total_size, i as u64, "wrong size for {}", dirs[i]);
+        }
+    }
+}
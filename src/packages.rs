@@ -2,9 +2,9 @@ use clap::ValueEnum;
 use serde::Serialize;
 use std::borrow::Borrow;
 use std::cmp::Ordering;
-use std::collections::{BTreeMap, BTreeSet};
+use std::collections::{BTreeMap, BTreeSet, VecDeque};
 use std::fmt::{self, Debug, Display};
-use std::io::{self, BufRead, Write};
+use std::io::{self, Write};
 use std::path::{Path, PathBuf};
 use std::str::FromStr;
 use std::time::SystemTime;
@@ -14,8 +14,8 @@ use crate::somehow::{somehow as anyhow, warn, Context, Error, LowLevelResult, Re
 
 use super::encoding::FilenameEncoder;
 use super::fs_util::{
-    create_tar_from_dir, file_size, summarize_dir, try_exists, try_iterdir, try_iterdir_dirs,
-    DirSummary, TarOptions,
+    create_tar_from_dir, file_size, summarize_dir, summarize_dirs, try_exists, try_iterdir,
+    try_iterdir_dirs, try_iterdir_dirs_unsorted, try_iterdir_unsorted, DirSummary, TarOptions,
 };
 use super::runner::{EnvironmentExists, Init, Runner, RunnerCommand};
 use super::{rel_time, time_serialize_opt, Bytes, Cubicle, EnvironmentName, HostPath, RunnerKind};
@@ -84,78 +84,152 @@ pub enum ShouldPackageUpdate {
 #[derive(Clone, Copy)]
 struct BuildDepends(bool);
 
+/// Memoized results of [`Cubicle::last_built`] during a single
+/// [`Cubicle::update_packages`] call. Entries must be removed when packages
+/// are rebuilt.
+type LastBuiltCache = BTreeMap<FullPackageName, Option<SystemTime>>;
+
+/// Memoized results of [`summarize_dir`] on package source directories during
+/// a single [`Cubicle::update_packages`] call. A package manager's managed
+/// packages all share its source directory.
+type DirSummaryCache = BTreeMap<HostPath, DirSummary>;
+
 fn transitive_depends(
     packages: &BTreeSet<FullPackageName>,
     specs: &PackageSpecs,
     build_depends: BuildDepends,
 ) -> Result<BTreeSet<FullPackageName>> {
-    struct Visitor<'a> {
-        specs: &'a PackageSpecs,
-        build_depends: BuildDepends,
-        visited: BTreeSet<FullPackageName>,
-    }
-
-    impl<'a> Visitor<'a> {
-        fn visit(
-            &mut self,
-            p: &FullPackageName,
-            needed_by: Option<&FullPackageName>,
-        ) -> Result<()> {
-            if !self.visited.contains(p) {
-                self.visited.insert(p.clone());
-                let spec = match &p.0 {
-                    PackageNamespace::Debian => {
-                        return Ok(());
-                    }
-                    PackageNamespace::Root => {
-                        self.specs.get(&p.1).ok_or_else(|| match needed_by {
-                            Some(other) => {
-                                anyhow!(
-                                    "could not find package definition for {p}, needed by {other}"
-                                )
-                            }
-                            None => anyhow!("could not find package definition for {p}"),
-                        })?
-                    }
-                    PackageNamespace::Managed(manager) => {
-                        let spec = self.specs.get(manager).ok_or_else(|| match needed_by {
-                        Some(other) => {
-                            anyhow!("could not find package definition for package manager {}, needed by {other}", p.0)
-                        }
-                        None => anyhow!("could not find package definition for {p}"),
-                    })?;
-                        if !spec.manifest.package_manager {
-                            return Err(anyhow!("package {} is not a package manager", p.0));
-                        }
-                        spec
-                    }
-                };
-                for (ns, table) in &spec.manifest.depends {
-                    for name in table.keys() {
-                        self.visit(&FullPackageName(ns.clone(), name.clone()), Some(p))?;
-                    }
+    let mut visited = BTreeSet::new();
+    // Maps each dependency to the package it was first discovered from, for
+    // error messages. The requested packages have no entry.
+    let mut needed_by: BTreeMap<FullPackageName, FullPackageName> = BTreeMap::new();
+    let mut queue: VecDeque<FullPackageName> = packages.iter().cloned().collect();
+
+    while let Some(p) = queue.pop_front() {
+        if visited.contains(&p) {
+            continue;
+        }
+        let spec = match &p.0 {
+            PackageNamespace::Debian => {
+                visited.insert(p);
+                continue;
+            }
+            PackageNamespace::Root => specs.get(&p.1).ok_or_else(|| match needed_by.get(&p) {
+                Some(other) => {
+                    anyhow!("could not find package definition for {p}, needed by {other}")
                 }
-                if self.build_depends.0 {
-                    for (ns, table) in &spec.manifest.build_depends {
-                        for name in table.keys() {
-                            self.visit(&FullPackageName(ns.clone(), name.clone()), Some(p))?;
-                        }
+                None => anyhow!("could not find package definition for {p}"),
+            })?,
+            PackageNamespace::Managed(manager) => {
+                let spec = specs.get(manager).ok_or_else(|| match needed_by.get(&p) {
+                    Some(other) => {
+                        anyhow!("could not find package definition for package manager {}, needed by {other}", p.0)
                     }
+                    None => anyhow!("could not find package definition for {p}"),
+                })?;
+                if !spec.manifest.package_manager {
+                    return Err(anyhow!("package {} is not a package manager", p.0));
+                }
+                spec
+            }
+        };
+
+        let build_depends = build_depends.0.then_some(&spec.manifest.build_depends);
+        for (ns, table) in spec
+            .manifest
+            .depends
+            .iter()
+            .chain(build_depends.into_iter().flatten())
+        {
+            for name in table.keys() {
+                let dep = FullPackageName(ns.clone(), name.clone());
+                if !visited.contains(&dep)
+                    && !packages.contains(&dep)
+                    && !needed_by.contains_key(&dep)
+                {
+                    needed_by.insert(dep.clone(), p.clone());
+                    queue.push_back(dep);
+                }
+            }
+        }
+        visited.insert(p);
+    }
+
+    Ok(visited)
+}
+
+/// Orders the packages so that each one comes after its dependencies and
+/// build-dependencies (using Kahn's algorithm).
+///
+/// Dependencies in the Debian namespace are ignored. Every other dependency
+/// must be included in `packages`, or else the package that needs it can't be
+/// ordered.
+fn topological_order(
+    packages: Vec<(FullPackageName, &PackageSpec)>,
+) -> Result<Vec<(FullPackageName, &PackageSpec)>> {
+    let index: BTreeMap<&FullPackageName, usize> = packages
+        .iter()
+        .enumerate()
+        .map(|(i, (full_name, _))| (full_name, i))
+        .collect();
+
+    // `waiting_on[i]` counts the unordered dependencies of `packages[i]`, and
+    // `dependents[i]` lists the packages that depend on `packages[i]`.
+    let mut waiting_on: Vec<usize> = vec![0; packages.len()];
+    let mut dependents: Vec<Vec<usize>> = vec![Vec::new(); packages.len()];
+    for (i, (_, spec)) in packages.iter().enumerate() {
+        for (ns, deps) in spec
+            .manifest
+            .depends
+            .iter()
+            .chain(spec.manifest.build_depends.iter())
+        {
+            if ns == &PackageNamespace::Debian {
+                continue;
+            }
+            for dep in deps.keys() {
+                waiting_on[i] += 1;
+                if let Some(&j) = index.get(&FullPackageName(ns.clone(), dep.clone())) {
+                    dependents[j].push(i);
                 }
             }
-            Ok(())
         }
     }
 
-    let mut visitor = Visitor {
-        specs,
-        build_depends,
-        visited: BTreeSet::new(),
-    };
-    for p in packages {
-        visitor.visit(p, None)?;
+    let mut ready: VecDeque<usize> = (0..packages.len())
+        .filter(|&i| waiting_on[i] == 0)
+        .collect();
+    let mut order: Vec<usize> = Vec::with_capacity(packages.len());
+    while let Some(i) = ready.pop_front() {
+        order.push(i);
+        for &j in &dependents[i] {
+            waiting_on[j] -= 1;
+            if waiting_on[j] == 0 {
+                ready.push_back(j);
+            }
+        }
     }
-    Ok(visitor.visited)
+
+    if order.len() < packages.len() {
+        let mut names = packages
+            .iter()
+            .zip(&waiting_on)
+            .filter(|(_, &waiting)| waiting > 0)
+            .map(|((full_name, _), _)| full_name.to_string())
+            .collect::<Vec<_>>();
+        names.sort_unstable();
+        return Err(anyhow!(
+            "package dependencies are unsatisfiable for: {}",
+            names.join(", ")
+        ));
+    }
+
+    let mut packages: Vec<Option<(FullPackageName, &PackageSpec)>> =
+        packages.into_iter().map(Some).collect();
+    Ok(order
+        .into_iter()
+        .map(|i| packages[i].take().unwrap())
+        .collect())
 }
 
 impl Cubicle {
@@ -254,7 +328,7 @@ impl Cubicle {
     pub fn get_package_names(&self) -> Result<BTreeSet<FullPackageName>> {
         let mut names = BTreeSet::new();
         let mut add = |dir: &HostPath| -> Result<()> {
-            for name in try_iterdir_dirs(dir)? {
+            for name in try_iterdir_dirs_unsorted(dir)? {
                 if let Some(name) = name
                     .to_str()
                     .and_then(|s| PackageName::strict_from_str(s).ok())
@@ -264,8 +338,8 @@ impl Cubicle {
             }
             Ok(())
         };
-        // Don't use try_iterdir_dirs to allow symlinks at this level.
-        for dir in try_iterdir(&self.shared.user_package_dir)? {
+        // Don't use try_iterdir_dirs_unsorted to allow symlinks at this level.
+        for dir in try_iterdir_unsorted(&self.shared.user_package_dir)? {
             add(&self.shared.user_package_dir.join(dir))?;
         }
         add(&self.shared.code_package_dir)?;
@@ -341,7 +415,7 @@ impl Cubicle {
         specs: &PackageSpecs,
         conditions: &UpdatePackagesConditions,
     ) -> Result<()> {
-        let mut todo: Vec<(FullPackageName, &PackageSpec)> =
+        let todo: Vec<(FullPackageName, &PackageSpec)> =
             transitive_depends(packages, specs, BuildDepends(true))?
                 .into_iter()
                 .filter(|FullPackageName(ns, _name)| ns != &PackageNamespace::Debian)
@@ -366,69 +440,39 @@ impl Cubicle {
                 .collect::<Result<_>>()?;
 
         let now = SystemTime::now();
-        let mut done: BTreeSet<FullPackageName> = BTreeSet::new();
-        loop {
-            let start_todos = todo.len();
-            if start_todos == 0 {
-                return Ok(());
-            }
-            let mut later: Vec<(FullPackageName, &PackageSpec)> = Vec::new();
-
-            for (full_name, spec) in todo {
-                let deps_ready = spec
-                    .manifest
-                    .depends
-                    .iter()
-                    .chain(spec.manifest.build_depends.iter())
-                    .all(|(ns, deps)| {
-                        ns == &PackageNamespace::Debian
-                            || deps
-                                .keys()
-                                .all(|dep| done.contains(&FullPackageName(ns.clone(), dep.clone())))
-                    });
-
-                if deps_ready {
-                    let needs_build = {
-                        if spec.update.is_none() {
-                            false
-                        } else {
-                            let when = if packages.contains(&full_name) {
-                                conditions.named
-                            } else {
-                                conditions.dependencies
-                            };
-                            match when {
-                                ShouldPackageUpdate::Always => true,
-                                ShouldPackageUpdate::IfStale => {
-                                    self.package_is_stale(&full_name, spec, now)?
-                                }
-                                ShouldPackageUpdate::IfRequired => {
-                                    self.last_built(&full_name).is_none()
-                                }
-                            }
-                        }
+        let mut last_built = LastBuiltCache::new();
+        let mut dir_summaries = DirSummaryCache::new();
+        for (full_name, spec) in topological_order(todo)? {
+            let needs_build = {
+                if spec.update.is_none() {
+                    false
+                } else {
+                    let when = if packages.contains(&full_name) {
+                        conditions.named
+                    } else {
+                        conditions.dependencies
                     };
-                    if needs_build {
-                        self.update_package(&full_name, spec, specs)?;
+                    match when {
+                        ShouldPackageUpdate::Always => true,
+                        ShouldPackageUpdate::IfStale => self.package_is_stale(
+                            &full_name,
+                            spec,
+                            now,
+                            &mut last_built,
+                            &mut dir_summaries,
+                        )?,
+                        ShouldPackageUpdate::IfRequired => self
+                            .last_built_cached(&full_name, &mut last_built)
+                            .is_none(),
                     }
-                    done.insert(full_name);
-                } else {
-                    later.push((full_name, spec));
                 }
+            };
+            if needs_build {
+                self.update_package(&full_name, spec, specs)?;
+                last_built.remove(&full_name);
             }
-            if later.len() == start_todos {
-                let mut names = later
-                    .iter()
-                    .map(|(full_name, _)| full_name.to_string())
-                    .collect::<Vec<_>>();
-                names.sort_unstable();
-                return Err(anyhow!(
-                    "package dependencies are unsatisfiable for: {}",
-                    names.join(", ")
-                ));
-            }
-            todo = later;
         }
+        Ok(())
     }
 
     fn package_tar(&self, name: &FullPackageName) -> HostPath {
@@ -441,7 +485,7 @@ impl Cubicle {
     }
 
     fn package_names_from_tars(&self) -> Result<Vec<FullPackageName>> {
-        Ok(try_iterdir(&self.shared.package_cache)?
+        Ok(try_iterdir_unsorted(&self.shared.package_cache)?
             .iter()
             .filter_map(|filename| {
                 FilenameEncoder::decode(filename)
@@ -477,13 +521,29 @@ impl Cubicle {
         metadata.modified().ok()
     }
 
+    /// Like [`Self::last_built`] but memoized in `cache`.
+    fn last_built_cached(
+        &self,
+        name: &FullPackageName,
+        cache: &mut LastBuiltCache,
+    ) -> Option<SystemTime> {
+        if let Some(built) = cache.get(name) {
+            return *built;
+        }
+        let built = self.last_built(name);
+        cache.insert(name.clone(), built);
+        built
+    }
+
     fn package_is_stale(
         &self,
         package_name: &FullPackageName,
         spec: &PackageSpec,
         now: SystemTime,
+        last_built: &mut LastBuiltCache,
+        dir_summaries: &mut DirSummaryCache,
     ) -> Result<bool> {
-        let built = match self.last_built(package_name) {
+        let built = match self.last_built_cached(package_name, last_built) {
             Some(built) => built,
             None => return Ok(true),
         };
@@ -494,8 +554,20 @@ impl Cubicle {
                 _ => {}
             }
         }
-        let DirSummary { last_modified, .. } = summarize_dir(&spec.dir)?;
-        if last_modified > built {
+        let DirSummary {
+            errors,
+            last_modified,
+            ..
+        } = match dir_summaries.get(&spec.dir) {
+            Some(summary) => summary.clone(),
+            None => {
+                let summary = summarize_dir(&spec.dir);
+                dir_summaries.insert(spec.dir.clone(), summary.clone());
+                summary
+            }
+        };
+        // If the sources can't be read fully, they may have changed.
+        if errors || last_modified > built {
             return Ok(true);
         }
         for (ns, table) in spec
@@ -506,7 +578,7 @@ impl Cubicle {
         {
             for name in table.keys() {
                 let full_name = FullPackageName(ns.clone(), name.clone());
-                if matches!(self.last_built(&full_name), Some(b) if b > built) {
+                if matches!(self.last_built_cached(&full_name, last_built), Some(b) if b > built) {
                     return Ok(true);
                 }
             }
@@ -670,7 +742,7 @@ impl Cubicle {
         let tar_file = NamedTempFile::new().todo_context()?;
         create_tar_from_dir(
             &spec.dir,
-            tar_file.as_file(),
+            io::BufWriter::new(tar_file.as_file()),
             &TarOptions {
                 prefix: Some(PathBuf::from("w")),
                 ..TarOptions::default()
@@ -752,7 +824,7 @@ impl Cubicle {
             let tar_file = NamedTempFile::new().todo_context()?;
             create_tar_from_dir(
                 &spec.dir,
-                tar_file.as_file(),
+                io::BufWriter::new(tar_file.as_file()),
                 &TarOptions {
                     prefix: Some(PathBuf::from("w")),
                     exclude: vec![],
@@ -799,11 +871,19 @@ impl Cubicle {
             }
         };
 
-        let root_packages = self.scan_packages()?.into_iter().map(
-            |(name, spec)| -> Result<(FullPackageName, PackageDetails)> {
+        let specs = self.scan_packages()?;
+        let edited: Vec<SystemTime> = {
+            let dirs: Vec<&HostPath> = specs.values().map(|spec| &spec.dir).collect();
+            summarize_dirs(&dirs)
+                .into_iter()
+                .map(|summary| summary.last_modified)
+                .collect()
+        };
+
+        let root_packages = specs.into_iter().zip(edited).map(
+            |((name, spec), edited)| -> Result<(FullPackageName, PackageDetails)> {
                 let full_name = FullPackageName(PackageNamespace::Root, name);
                 let (built, size) = metadata(&full_name);
-                let edited = summarize_dir(&spec.dir).ok().map(|s| s.last_modified);
                 let last_build_failed = self.package_build_failed(&full_name)?;
                 Ok((
                     full_name,
@@ -838,7 +918,7 @@ impl Cubicle {
                             })
                             .collect(),
                         dir: Some(spec.dir.as_host_raw().to_owned()),
-                        edited,
+                        edited: Some(edited),
                         last_build_failed,
                         package_manager: spec.manifest.package_manager,
                         origin: spec.origin,
@@ -952,13 +1032,10 @@ impl Cubicle {
         let mut buf = Vec::new();
         self.runner
             .copy_out_from_work(name, Path::new("packages.txt"), &mut buf)?;
-        let reader = io::BufReader::new(buf.as_slice());
-        let names = reader
+        let buf = String::from_utf8(buf).todo_context()?;
+        let names = buf
             .lines()
-            .map(|line| match line {
-                Ok(line) => FullPackageName::from_str(&line),
-                Err(e) => Err(e).todo_context(),
-            })
+            .map(FullPackageName::from_str)
             .collect::<Result<BTreeSet<FullPackageName>>>()
             .todo_context()?;
         Ok(names)
@@ -1101,8 +1178,19 @@ impl PartialOrd for FullPackageName {
 /// `(namespace, package)` for other namespaces.
 impl Ord for FullPackageName {
     fn cmp(&self, other: &Self) -> std::cmp::Ordering {
-        // TODO: avoid allocations
-        self.unquoted().cmp(&other.unquoted())
+        // This compares the bytes of `unquoted()` without allocating.
+        fn bytes(FullPackageName(ns, name): &FullPackageName) -> impl Iterator<Item = u8> + '_ {
+            let prefix: [&[u8]; 2] = match ns {
+                PackageNamespace::Root => [b"", b""],
+                _ => [ns.as_str().as_bytes(), b"."],
+            };
+            prefix
+                .into_iter()
+                .flatten()
+                .chain(name.as_str().as_bytes())
+                .copied()
+        }
+        bytes(self).cmp(bytes(other))
     }
 }
 
@@ -1172,7 +1260,7 @@ pub fn write_package_list_tar(
 ) -> Result<tempfile::NamedTempFile> {
     let file = tempfile::NamedTempFile::new().todo_context()?;
     let metadata = file.as_file().metadata().todo_context()?;
-    let mut builder = tar::Builder::new(file.as_file());
+    let mut builder = tar::Builder::new(io::BufWriter::new(file.as_file()));
     let mut header = tar::Header::new_gnu();
     #[cfg(unix)]
     {
@@ -1183,19 +1271,13 @@ pub fn write_package_list_tar(
         header.set_mode(metadata.mode());
     }
 
-    let mut buf = Vec::new();
-    for name in packages {
-        if name.0 == PackageNamespace::Root && name.1.as_str() == special::AUTO_INTERACTIVE {
-            continue;
-        }
-        writeln!(buf, "{}", name.unquoted()).todo_context()?;
-    }
+    let buf = package_list_txt(packages);
     header.set_size(buf.len() as u64);
     builder
         .append_data(
             &mut header,
             Path::new("w").join("packages.txt"),
-            buf.as_slice(),
+            buf.as_bytes(),
         )
         .todo_context()?;
     builder
@@ -1205,6 +1287,20 @@ pub fn write_package_list_tar(
     Ok(file)
 }
 
+/// Returns the contents of an environment's `packages.txt`, which lists the
+/// packages to use when the environment is reset.
+fn package_list_txt(packages: &BTreeSet<FullPackageName>) -> String {
+    let mut buf = String::new();
+    for name in packages {
+        if name.0 == PackageNamespace::Root && name.1.as_str() == special::AUTO_INTERACTIVE {
+            continue;
+        }
+        buf.push_str(&name.unquoted());
+        buf.push('\n');
+    }
+    buf
+}
+
 fn strict_debian_packages(
     packages: &BTreeSet<FullPackageName>,
     specs: &PackageSpecs,
@@ -1274,4 +1370,170 @@ mod tests {
 
         assert_eq!("b b.a c c.x d", names.map(|name| name.unquoted()).join(" "));
     }
+
+    #[test]
+    fn package_list_txt() {
+        let packages = ["auto", "b", "a.x", "default"]
+            .map(|s| FullPackageName::from_str(s).unwrap())
+            .into_iter()
+            .collect();
+        assert_eq!("a.x\nb\ndefault\n", super::package_list_txt(&packages));
+    }
+
+    fn test_spec(depends: &[&str], build_depends: &[&str]) -> PackageSpec {
+        let table = |names: &[&str]| {
+            let mut table = BTreeMap::from([(PackageNamespace::Root, BTreeMap::new())]);
+            for name in names {
+                let FullPackageName(ns, name) = FullPackageName::from_str(name).unwrap();
+                table.entry(ns).or_default().insert(name, Dependency {});
+            }
+            table
+        };
+        PackageSpec {
+            manifest: Manifest {
+                package_manager: false,
+                targets: None,
+                depends: table(depends),
+                build_depends: table(build_depends),
+            },
+            dir: HostPath::try_from(String::from("/nonexistent")).unwrap(),
+            origin: String::from("test"),
+            update: None,
+            test: None,
+        }
+    }
+
+    fn test_transitive_depends(
+        specs: impl IntoIterator<Item = (&'static str, PackageSpec)>,
+        packages: &[&str],
+        build_depends: bool,
+    ) -> Result<String> {
+        let specs: PackageSpecs = specs
+            .into_iter()
+            .map(|(name, spec)| (PackageName::strict_from_str(name).unwrap(), spec))
+            .collect();
+        let packages = packages
+            .iter()
+            .map(|name| FullPackageName::from_str(name).unwrap())
+            .collect();
+        Ok(
+            transitive_depends(&packages, &specs, BuildDepends(build_depends))?
+                .into_iter()
+                .map(|name| name.unquoted())
+                .collect::<Vec<_>>()
+                .join(" "),
+        )
+    }
+
+    #[test]
+    fn transitive_depends_build_depends() {
+        let specs = || {
+            [
+                ("a", test_spec(&["b"], &["c"])),
+                ("b", test_spec(&["debian.curl"], &[])),
+                ("c", test_spec(&["d"], &[])),
+                ("d", test_spec(&[], &[])),
+                ("e", test_spec(&[], &[])),
+            ]
+        };
+        assert_eq!(
+            "a b debian.curl",
+            test_transitive_depends(specs(), &["a"], false).unwrap()
+        );
+        assert_eq!(
+            "a b c d debian.curl",
+            test_transitive_depends(specs(), &["a"], true).unwrap()
+        );
+    }
+
+    #[test]
+    fn transitive_depends_missing() {
+        let specs = || [("a", test_spec(&["b"], &[]))];
+        assert_eq!(
+            "could not find package definition for \"b\", needed by \"a\"",
+            test_transitive_depends(specs(), &["a"], false)
+                .unwrap_err()
+                .to_string()
+        );
+        assert_eq!(
+            "could not find package definition for \"x\"",
+            test_transitive_depends(specs(), &["x"], false)
+                .unwrap_err()
+                .to_string()
+        );
+    }
+
+    #[test]
+    fn transitive_depends_managed() {
+        let specs = || {
+            let mut npm = test_spec(&["debian.nodejs"], &[]);
+            npm.manifest.package_manager = true;
+            [
+                ("a", test_spec(&["npm.foo"], &[])),
+                ("b", test_spec(&["pip.bar"], &[])),
+                ("c", test_spec(&["d.baz"], &[])),
+                ("d", test_spec(&[], &[])),
+                ("npm", npm),
+            ]
+        };
+        assert_eq!(
+            "a debian.nodejs npm.foo",
+            test_transitive_depends(specs(), &["a"], false).unwrap()
+        );
+        assert_eq!(
+            "could not find package definition for package manager \"pip\", needed by \"b\"",
+            test_transitive_depends(specs(), &["b"], false)
+                .unwrap_err()
+                .to_string()
+        );
+        assert_eq!(
+            "could not find package definition for \"pip.bar\"",
+            test_transitive_depends(specs(), &["pip.bar"], false)
+                .unwrap_err()
+                .to_string()
+        );
+        assert_eq!(
+            "package \"d\" is not a package manager",
+            test_transitive_depends(specs(), &["c"], false)
+                .unwrap_err()
+                .to_string()
+        );
+    }
+
+    fn test_topological_order(specs: &[(&str, PackageSpec)]) -> Result<String> {
+        let packages = specs
+            .iter()
+            .map(|(name, spec)| (FullPackageName::from_str(name).unwrap(), spec))
+            .collect();
+        Ok(topological_order(packages)?
+            .into_iter()
+            .map(|(name, _)| name.unquoted())
+            .collect::<Vec<_>>()
+            .join(" "))
+    }
+
+    #[test]
+    fn topological_order_ok() {
+        let specs = [
+            ("a", test_spec(&["b"], &["c"])),
+            ("b", test_spec(&["c"], &[])),
+            ("c", test_spec(&[], &[])),
+            ("d", test_spec(&[], &[])),
+        ];
+        assert_eq!("c d b a", test_topological_order(&specs).unwrap());
+    }
+
+    #[test]
+    fn topological_order_unsatisfiable() {
+        let specs = [
+            ("a", test_spec(&["b"], &[])),
+            ("b", test_spec(&[], &["a"])),
+            ("c", test_spec(&[], &[])),
+            ("d", test_spec(&["e"], &[])),
+        ];
+        assert_eq!(
+            "package dependencies are unsatisfiable for: \"a\", \"b\", \"d\"",
+            test_topological_order(&specs).unwrap_err().to_string()
+        );
+    }
 }
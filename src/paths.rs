@@ -16,7 +16,7 @@ use std::path::{Path, PathBuf};
 /// 2. It does not allow joining to absolute paths.
 macro_rules! abs_path {
     ($name:ident, $getter:ident) => {
-        #[derive(Debug, Clone)]
+        #[derive(Debug, Clone, PartialEq, Eq, PartialOrd, Ord)]
         pub struct $name(PathBuf);
 
         impl $name {
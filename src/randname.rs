@@ -1,5 +1,5 @@
 use rand::seq::SliceRandom;
-use std::io::{self, BufRead};
+use std::io::{self, Read};
 
 use super::HostPath;
 use crate::somehow::{somehow as anyhow, warn, Context, Result};
@@ -83,7 +83,7 @@ impl RandomNameGenerator {
                         format!("error downloading word list from {:?}", self.eff_url)
                     })?;
                 std::fs::create_dir_all(self.cache_dir.as_host_raw()).todo_context()?;
-                std::fs::write(eff_word_list.as_host_raw(), body).todo_context()?;
+                std::fs::write(eff_word_list.as_host_raw(), eff_words(&body)).todo_context()?;
                 std::fs::File::open(eff_word_list.as_host_raw()).todo_context()?
             }
             Err(e) => return Err(e).todo_context(),
@@ -92,22 +92,37 @@ impl RandomNameGenerator {
     }
 }
 
-fn from_reader<R, F>(reader: R, filter: F) -> Result<String>
+/// Returns the words from the EFF list, one per line, without the dice
+/// numbers. This is what gets cached, so later reads have less to parse.
+fn eff_words(body: &str) -> String {
+    let mut words = String::with_capacity(body.len());
+    for word in body.split_ascii_whitespace() {
+        if !is_dice_number(word) {
+            words.push_str(word);
+            words.push('\n');
+        }
+    }
+    words
+}
+
+fn is_dice_number(word: &str) -> bool {
+    word.chars().all(char::is_numeric)
+}
+
+fn from_reader<R, F>(mut reader: R, filter: F) -> Result<String>
 where
     R: std::io::Read,
     F: Fn(&str) -> Result<bool>,
 {
     let mut rng = rand::thread_rng();
-    let reader = io::BufReader::new(reader);
-    let lines = reader
-        .lines()
-        .collect::<Result<Vec<String>, _>>()
-        .todo_context()?;
+    let mut buf = String::new();
+    reader.read_to_string(&mut buf).todo_context()?;
+    let lines = buf.lines().collect::<Vec<&str>>();
     for _ in 0..200 {
         if let Some(line) = lines.choose(&mut rng) {
             for word in line.split_ascii_whitespace() {
-                if word.chars().all(char::is_numeric) {
-                    // probably diceware numbers
+                if is_dice_number(word) {
+                    // Older caches and other word lists may include these.
                     continue;
                 }
                 if filter(word)? {
@@ -124,6 +139,14 @@ mod tests {
     use super::HostPath;
     use expect_test::expect;
 
+    #[test]
+    fn eff_words() {
+        assert_eq!(
+            "acid\nacorn\nyo-yo\n",
+            super::eff_words("1111\tacid\n1112\tacorn\n6666\tyo-yo\n")
+        );
+    }
+
     #[test]
     fn download_or_open_eff_list() {
         let tmpdir = tempfile::tempdir().unwrap();
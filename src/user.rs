@@ -452,8 +452,7 @@ impl Runner for User {
                 // This should fail gracefully if this user can't read that
                 // user's files. We should maybe just invoke `du` as that user,
                 // but it'd need to be tolerant of different versions of `du`.
-                let summary =
-                    summarize_dir(&home).unwrap_or_else(|_| DirSummary::new_with_errors());
+                let summary = summarize_dir(&home);
                 let work_dir_path = Some(home.join("w"));
                 Ok(EnvFilesSummary {
                     home_dir_path: Some(home),